@@ -1,23 +1,43 @@
-import requests
-from solana.rpc.api import Client
-from solana.publickey import PublicKey
-from solana.transaction import Transaction
-from solana.system_program import TransferParams, transfer
-from solana.keypair import Keypair
+import httpx
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.providers.async_http import AsyncHTTPProvider
+from solders.pubkey import Pubkey
+from solders.keypair import Keypair
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.message import Message
+from solders.transaction import Transaction
+from solders.system_program import ID as SYSTEM_PROGRAM_ID, TransferParams, transfer
 from solana.rpc.types import TxOpts
 from solana.rpc.commitment import Confirmed
 from solana.rpc.core import RPCException
 from solana.sysvar import SYSVAR_RENT_PUBKEY
-from spl.token.constants import TOKEN_PROGRAM_ID
-from spl.token.instructions import transfer_checked, TransferCheckedParams
-import json
+import orjson
+import struct
+import sys
 import logging
 from getpass import getpass
-import base58
+import based58
+import base64
 import pyotp
 import csv
+import io
+import aiofiles
+import ijson
 import aiohttp
 import asyncio
+import concurrent.futures
+import hashlib
+import hmac
+import time
+import random
+import functools
+import itertools
+import os
+from dataclasses import dataclass, field
+from cachetools import TTLCache
+import diskcache
+from aioconsole import ainput
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -25,55 +45,225 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 # DeepSeek API details
 DEEPSEEK_API_URL = "https://api.deepseek.com/v1/generate"
 DEEPSEEK_API_KEY = "your_deepseek_api_key"
+DEEPSEEK_HEADERS = {
+    "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+    "Content-Type": "application/json"
+}
+
+# Generated content also persists on disk (opened by the chatbot) so it survives restarts instead of
+# being regenerated and re-billed. Override the location with PORRIMA_CACHE_DIR.
+CONTENT_CACHE_DIR = os.environ.get("PORRIMA_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "porrima"
+)
+CONTENT_CACHE_SIZE_LIMIT = 2 << 30  # bytes
+
+# Market data endpoints
+NFTS_URL = "https://api.simplehash.com/api/v0/nfts/owners?wallet_addresses="
+SOL_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd"
+
+# Shared HTTP session: keep-alive + HTTP/2 so repeated calls skip the TCP/TLS handshake
+http_session = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+    timeout=30
+)
+
+# Outbound retry policy: exponential backoff with jitter on rate limits and server errors
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+outbound_limit = asyncio.Semaphore(10)  # Caps concurrent outbound requests to avoid self-inflicted rate limiting
+
+# Shared pool for blocking work (terminal prompts, file I/O) so it never stalls the event loop
+io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+# RPC calls issued within BATCH_WINDOW seconds of each other are sent as one JSON-RPC batch.
+# Providers still bill per call inside a batch and the slowest call holds up the whole
+# response (head-of-line blocking), so batches are capped at BATCH_SIZE calls.
+BATCH_WINDOW = 0.010
+BATCH_SIZE = 20
+
+class BatchingProvider(AsyncHTTPProvider):
+    """Solana RPC provider that coalesces concurrent calls into JSON-RPC batches on the shared session."""
+
+    def __init__(self, endpoint, **kwargs):
+        # Skip AsyncHTTPProvider.__init__, which would create (and leak) an httpx client of its own
+        super(AsyncHTTPProvider, self).__init__(endpoint, **kwargs)
+        self.session = http_session
+        self._pending = []  # [(method, params, future)]
+        self._flush_handle = None
+        self._in_flight = set()  # Strong references so running batch tasks aren't garbage-collected
+
+    async def make_request(self, method, *params):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((method, list(params), future))
+        if len(self._pending) >= BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(BATCH_WINDOW, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send everything buffered so far as a single batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._send_batch(pending))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send_batch(self, pending):
+        try:
+            replies = await _batch_rpc([(method, params) for method, params, _ in pending])
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for i, (method, _, future) in enumerate(pending):
+            if future.done():
+                continue
+            if i in replies:
+                future.set_result(replies[i])
+            else:
+                future.set_exception(RPCException(f"No response to {method} in batch reply"))
 
 # Solana network details
 SOLANA_NETWORK_URL = "https://api.mainnet-beta.solana.com"  # Use "https://api.devnet.solana.com" for testing
-solana_client = Client(SOLANA_NETWORK_URL)
+RPC_HEADERS = {"Content-Type": "application/json"}
+solana_client = AsyncClient(SOLANA_NETWORK_URL)
+solana_client._provider = BatchingProvider(SOLANA_NETWORK_URL)
+MAX_TRANSACTION_SIZE = 1232  # bytes; serialized transactions must fit in one network packet
+
+# SPL Token program
+TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+TRANSFER_CHECKED_TAG = 12  # TokenInstruction::TransferChecked
+ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+CREATE_IDEMPOTENT_TAG = 1  # AssociatedTokenAccountInstruction::CreateIdempotent
+MINT_DECIMALS_OFFSET = 44  # Byte offset of `decimals` in an SPL mint account
+
+# Recent blockhash cache: a blockhash is accepted for roughly 60-90s, so reuse it for
+# BLOCKHASH_TTL seconds and refresh it in the background every BLOCKHASH_REFRESH_INTERVAL
+BLOCKHASH_TTL = 30
+BLOCKHASH_REFRESH_INTERVAL = 20
+BLOCKHASH_RETRY_DELAY = 0.4  # Roughly one slot, the rate at which new blockhashes appear
+# "signed" holds the signatures already made against "value": the cluster deduplicates by signature,
+# so an identical transfer repeated while the blockhash is cached must wait for a newer one
+_blockhash = {"value": None, "exp": 0, "signed": set()}
+
+# Signatures per batched getTransaction request when exporting history
+EXPORT_CHUNK_SIZE = 100
+# CSV rows formatted per file write when exporting history
+EXPORT_WRITE_ROWS = 4096
 
 # Wallet management
-wallets = {}  # Stores multiple wallets: {wallet_name: Keypair}
+@dataclass(frozen=True)
+class Wallet:
+    """A connected wallet; the public key and its base58 address are derived once at connect time."""
+    keypair: Keypair
+    public_key: Pubkey
+    address: str
+    senders: dict = field(default_factory=dict, compare=False)  # Transfer builders: {token_address or None: build}
+
+wallets = {}  # Stores multiple wallets: {wallet_name: Wallet}
 current_wallet = None  # Tracks the currently active wallet
 
-# Cache for generated content
-content_cache = {}
+# Bounded caches for generated content and idempotent reads
+content_cache = TTLCache(maxsize=10_000, ttl=3600)  # {sha256(model|max_tokens|prompt): text}
+price_cache = TTLCache(maxsize=1, ttl=30)
+nft_cache = TTLCache(maxsize=512, ttl=60)  # {wallet_address: [nft, ...]}
+signature_cache = TTLCache(maxsize=1024, ttl=15)  # {(wallet_address, limit, before): response}
 
 # 2FA setup
 totp = pyotp.TOTP(pyotp.random_base32())
+_totp_codes = {"exp": 0, "codes": ()}  # Accepted codes for the current time step, refreshed on expiry
 
 # Helper Functions
-def generate_with_deepseek(prompt, model="default", max_tokens=100):
-    """Generate content using DeepSeek API with advanced options."""
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    data = {
-        "prompt": prompt,
-        "model": model,
-        "max_tokens": max_tokens
-    }
+def _is_retryable(error):
+    """Whether a failed outbound call is worth retrying (rate limits, server errors, dropped connections)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUSES
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(error, (httpx.TransportError, aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+async def _with_retry(coro_factory, retries=MAX_RETRIES, base=RETRY_BASE_DELAY):
+    """Await coro_factory() under the outbound concurrency cap, retrying transient failures with backoff."""
+    for attempt in range(retries + 1):
+        try:
+            async with outbound_limit:
+                return await coro_factory()
+        except Exception as e:
+            if attempt == retries or not _is_retryable(e):
+                raise
+            delay = base * 2 ** attempt + random.random() * 0.25
+            logging.warning(f"Request failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def _post(url, **kwargs):
+    """POST through the shared HTTP session, raising on error statuses."""
+    response = await http_session.post(url, **kwargs)
+    response.raise_for_status()
+    return response
+
+async def _get_json(session, url):
+    """GET a JSON document through an aiohttp session, raising on error statuses."""
+    async with session.get(url, raise_for_status=True) as response:
+        return await response.json(loads=orjson.loads)
+
+@functools.lru_cache(maxsize=4096)
+def _pk(address: str) -> Pubkey:
+    """Return a cached Pubkey for a base58 address, so repeat recipients skip the decode."""
+    return Pubkey.from_string(address)
+
+async def generate_with_deepseek(prompt, model="default", max_tokens=100, disk_cache=None):
+    """Generate content using DeepSeek API with advanced options, optionally persisting results to `disk_cache`."""
+    cache_key = hashlib.sha256(f"{model}|{max_tokens}|{prompt}".encode()).hexdigest()
+    if cache_key in content_cache:
+        return content_cache[cache_key]
+    loop = asyncio.get_running_loop()
+    if disk_cache is not None:
+        cached = await loop.run_in_executor(io_executor, disk_cache.get, cache_key)
+        if cached is not None:
+            content_cache[cache_key] = cached
+            return cached
+    # Serialize once up front so retries resend the same bytes
+    body = orjson.dumps({"prompt": prompt, "model": model, "max_tokens": max_tokens})
     try:
-        response = requests.post(DEEPSEEK_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-        generated_text = response.json()["choices"][0]["text"]
-        content_cache[prompt] = generated_text  # Cache the result
+        response = await _with_retry(lambda: _post(DEEPSEEK_API_URL, headers=DEEPSEEK_HEADERS, content=body))
+        generated_text = orjson.loads(response.content)["choices"][0]["text"]
+        content_cache[cache_key] = generated_text  # Cache the result
+        if disk_cache is not None:
+            await loop.run_in_executor(io_executor, disk_cache.set, cache_key, generated_text)
         return generated_text
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logging.error(f"DeepSeek API Error: {e}")
         raise
 
 def verify_2fa(code: str) -> bool:
-    """Verify 2FA code."""
-    return totp.verify(code)
+    """Verify 2FA code against the current time step and its neighbours (±1 step)."""
+    now = time.time()
+    if now >= _totp_codes["exp"]:
+        t = int(now)
+        step = totp.interval
+        _totp_codes["codes"] = tuple(totp.at(t + offset).encode() for offset in (-step, 0, step))
+        _totp_codes["exp"] = (t // step + 1) * step
+    candidate = code.strip().encode()
+    # Constant-time compare so response timing doesn't leak how much of the code matched
+    return any(hmac.compare_digest(candidate, valid) for valid in _totp_codes["codes"])
 
 def connect_wallet(wallet_name, private_key=None):
     """Connect a wallet by name and store it securely."""
     if not private_key:
         private_key = getpass("Enter your private key (base58 encoded): ")
     try:
-        keypair = Keypair.from_secret_key(base58.b58decode(private_key))
-        wallets[wallet_name] = keypair
-        logging.info(f"Wallet '{wallet_name}' connected: {keypair.public_key}")
+        keypair = Keypair.from_bytes(based58.b58decode(private_key.encode()))
+        public_key = keypair.pubkey()
+        wallets[wallet_name] = Wallet(keypair, public_key, str(public_key))
+        logging.info(f"Wallet '{wallet_name}' connected: {public_key}")
     except Exception as e:
         logging.error(f"Failed to connect wallet: {e}")
         raise
@@ -87,209 +277,702 @@ def switch_wallet(wallet_name):
     else:
         logging.error(f"Wallet '{wallet_name}' not found.")
 
-async def get_nfts(wallet_address):
-    """Fetch NFTs for a wallet address."""
-    url = f"https://api.simplehash.com/api/v0/nfts/owners?wallet_addresses={wallet_address}"
+async def stream_nfts(session, wallet_address):
+    """Yield the NFTs held by a wallet address as they are parsed off the wire."""
+    cached = nft_cache.get(str(wallet_address))
+    if cached is not None:
+        for nft in cached:
+            yield nft
+        return
+    url = NFTS_URL + str(wallet_address)
+    nfts = []
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    nfts = await response.json()
-                    return nfts
-                else:
-                    logging.error(f"Failed to fetch NFTs: {response.status}")
-                    return None
+        response = await _with_retry(lambda: session.get(url, raise_for_status=True))
+        async with response:
+            # Parse the body incrementally so the first NFTs show up before the whole listing arrives
+            async for nft in ijson.items(response.content, "nfts.item", use_float=True):
+                nfts.append(nft)
+                yield nft
+    except aiohttp.ClientResponseError as e:
+        logging.error(f"Failed to fetch NFTs: {e.status}")
+        return
     except Exception as e:
         logging.error(f"Error fetching NFTs: {e}")
-        return None
+        return
+    nft_cache[str(wallet_address)] = nfts
 
-async def get_sol_price():
+async def get_sol_price(session):
     """Fetch the current SOL price."""
-    url = "https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd"
+    if "usd" in price_cache:
+        return price_cache["usd"]
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    price_data = await response.json()
-                    return price_data["solana"]["usd"]
-                else:
-                    logging.error(f"Failed to fetch SOL price: {response.status}")
-                    return None
+        price_data = await _with_retry(lambda: _get_json(session, SOL_PRICE_URL))
+        price_cache["usd"] = price_data["solana"]["usd"]
+        return price_cache["usd"]
+    except aiohttp.ClientResponseError as e:
+        logging.error(f"Failed to fetch SOL price: {e.status}")
+        return None
     except Exception as e:
         logging.error(f"Error fetching SOL price: {e}")
         return None
 
-def export_transaction_history(wallet_address, filename="transactions.csv"):
-    """Export transaction history to a CSV file."""
-    transactions = receive_solana_transactions(wallet_address)
-    if transactions:
-        with open(filename, "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Signature", "Slot", "Block Time"])
-            for tx in transactions["result"]:
-                writer.writerow([tx["signature"], tx["slot"], tx["blockTime"]])
-        logging.info(f"Transaction history exported to {filename}")
+def _export_row(tx, response):
+    """Flatten a signature entry and its getTransaction response into a CSV row."""
+    result = response.get("result")
+    meta = result["meta"] if result else None
+    if meta is None:
+        return (tx["signature"], tx["slot"], tx["blockTime"], None, "unknown")
+    return (tx["signature"], tx["slot"], tx["blockTime"], meta["fee"], "failed" if meta["err"] else "ok")
+
+async def export_transaction_history(wallet_address, filename="transactions.csv", limit=10):
+    """Export transaction history, with the fee and status of each transaction, to a CSV file."""
+    transactions = await receive_solana_transactions(wallet_address, limit)
+    if "result" not in transactions:
+        logging.error(f"Failed to fetch transactions: {transactions.get('error')}")
+        raise RPCException(transactions.get("error", transactions))
+    signatures = transactions["result"]
+    chunks = [signatures[i:i + EXPORT_CHUNK_SIZE] for i in range(0, len(signatures), EXPORT_CHUNK_SIZE)]
+    # One batched getTransaction request per chunk, all chunks in flight at once
+    details = await asyncio.gather(*(
+        batch_rpc([
+            ("getTransaction", [tx["signature"], {"encoding": "json", "maxSupportedTransactionVersion": 0}])
+            for tx in chunk
+        ])
+        for chunk in chunks
+    ))
+    # Rows are produced lazily so only one slice of formatted rows is held at a time
+    rows = itertools.chain(
+        [("Signature", "Slot", "Block Time", "Fee", "Status")],
+        (
+            _export_row(tx, response)
+            for chunk, responses in zip(chunks, details)
+            for tx, response in zip(chunk, responses)
+        )
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    async with aiofiles.open(filename, "w", newline="", buffering=1 << 20, executor=io_executor) as file:
+        # writerows formats each slice in C; slicing keeps the text buffer small for large exports
+        for batch in iter(lambda: list(itertools.islice(rows, EXPORT_WRITE_ROWS)), []):
+            writer.writerows(batch)
+            await file.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+    logging.info(f"Transaction history exported to {filename}")
 
 # Solana Functions
-def send_solana_transaction(sender_keypair, recipient_address, amount, token_address=None, decimals=9):
-    """Send SOL or SPL tokens on the Solana blockchain."""
-    code = input("Enter 2FA code: ")
+def transfer_checked(source, mint, dest, owner, amount, decimals):
+    """Build an SPL Token TransferChecked instruction."""
+    return Instruction(
+        TOKEN_PROGRAM_ID,
+        struct.pack("<BQB", TRANSFER_CHECKED_TAG, amount, decimals),
+        [
+            AccountMeta(source, is_signer=False, is_writable=True),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(dest, is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=True, is_writable=False)
+        ]
+    )
+
+@functools.lru_cache(maxsize=4096)
+def get_associated_token_address(owner, mint):
+    """Derive the associated token account holding `mint` tokens for `owner`."""
+    seeds = [bytes(owner), bytes(TOKEN_PROGRAM_ID), bytes(mint)]
+    return Pubkey.find_program_address(seeds, ASSOCIATED_TOKEN_PROGRAM_ID)[0]
+
+def create_associated_token_account_idempotent(payer, owner, mint, associated_account):
+    """Build an instruction that creates `owner`'s associated token account unless it already exists."""
+    return Instruction(
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        bytes([CREATE_IDEMPOTENT_TAG]),
+        [
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(associated_account, is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=False, is_writable=False),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(TOKEN_PROGRAM_ID, is_signer=False, is_writable=False)
+        ]
+    )
+
+def sign_transaction(instructions, payer, signers, blockhash):
+    """Compile and sign a transaction entirely in solders, with no Python-side serialization."""
+    return Transaction.new_signed_with_payer(instructions, payer, signers, blockhash)
+
+def make_sol_sender(wallet):
+    """Precompile SOL transfers from `wallet`.
+
+    Returns build(recipient_address, amount) -> instructions, awaited like make_spl_sender's builder.
+    """
+    payer = wallet.public_key
+
+    async def build(recipient_address, amount):
+        # Amount in lamports (1 SOL = 1,000,000,000 lamports)
+        return [transfer(TransferParams(from_pubkey=payer, to_pubkey=_pk(recipient_address), lamports=amount))]
+
+    return build
+
+async def make_spl_sender(wallet, token_address, first_recipient_address=None):
+    """Precompile transfers of the `token_address` token from `wallet`.
+
+    The sender's token account, the mint's decimals and (if given) the first recipient's token account
+    are resolved together, in one RPC call. Returns build(recipient_address, amount) -> instructions;
+    other recipients' token accounts are looked up on first use and remembered once they exist.
+    """
+    payer = wallet.public_key
+    mint = _pk(token_address)
+    source = get_associated_token_address(payer, mint)
+    accounts = [source, mint]
+    if first_recipient_address:
+        accounts.append(get_associated_token_address(_pk(first_recipient_address), mint))
+    response = await solana_client.get_multiple_accounts([str(account) for account in accounts])
+    source_info, mint_info, *dest_info = response["result"]["value"]
+    if mint_info is None:
+        raise ValueError(f"Token mint {token_address} not found.")
+    if source_info is None:
+        raise ValueError(f"Sender has no token account for mint {token_address}.")
+    decimals = base64.b64decode(mint_info["data"][0])[MINT_DECIMALS_OFFSET]
+    known = {}  # {recipient token account: exists}
+    if dest_info:
+        known[accounts[2]] = dest_info[0] is not None
+
+    async def build(recipient_address, amount):
+        recipient = _pk(recipient_address)
+        dest = get_associated_token_address(recipient, mint)
+        instructions = []
+        exists = known.get(dest)
+        if exists is None:
+            info = await solana_client.get_account_info(str(dest))
+            exists = info["result"]["value"] is not None
+        if exists:
+            known[dest] = True
+        else:
+            known.pop(dest, None)  # It may exist by the next send, so look it up again then
+            instructions.append(create_associated_token_account_idempotent(payer, recipient, mint, dest))
+        instructions.append(transfer_checked(source, mint, dest, payer, amount, decimals))
+        return instructions
+
+    return build
+
+async def get_transfer_builder(wallet, token_address=None, recipient_address=None):
+    """Return the wallet's cached builder for SOL transfers, or for `token_address` SPL transfers.
+
+    `recipient_address` is the first recipient, resolved along with the builder when one has to be made.
+    """
+    build = wallet.senders.get(token_address)
+    if build is None:
+        if token_address:
+            build = await make_spl_sender(wallet, token_address, recipient_address)
+        else:
+            build = make_sol_sender(wallet)
+        wallet.senders[token_address] = build
+    return build
+
+async def build_transfer_instructions(sender_wallet, recipient_address, amount, token_address=None):
+    """Build the instructions for a SOL or SPL token transfer."""
+    build = await get_transfer_builder(sender_wallet, token_address, recipient_address)
+    return await build(recipient_address, amount)
+
+async def _fetch_blockhash():
+    """Fetch a recent blockhash from the RPC and store it in the cache."""
+    response = await solana_client.get_latest_blockhash()
+    blockhash = Hash.from_string(response["result"]["value"]["blockhash"])
+    if blockhash != _blockhash["value"]:
+        _blockhash["signed"] = set()
+    _blockhash["value"] = blockhash
+    _blockhash["exp"] = time.monotonic() + BLOCKHASH_TTL
+    return _blockhash["value"]
+
+async def get_latest_blockhash():
+    """Return a recent blockhash to sign transactions against, reusing the cached one while fresh."""
+    if time.monotonic() < _blockhash["exp"]:
+        return _blockhash["value"]
+    return await _fetch_blockhash()
+
+async def sign_with_recent_blockhash(instructions, payer, signers):
+    """Sign against the cached recent blockhash, moving to a newer one if this exact transaction was already signed."""
+    blockhash = await get_latest_blockhash()
+    while True:
+        transaction = sign_transaction(instructions, payer, signers, blockhash)
+        signature = transaction.signatures[0]
+        if signature not in _blockhash["signed"]:
+            _blockhash["signed"].add(signature)
+            return transaction
+        fresh = await _fetch_blockhash()
+        if fresh == blockhash:
+            await asyncio.sleep(BLOCKHASH_RETRY_DELAY)
+        blockhash = fresh
+
+async def refresh_blockhash_periodically():
+    """Keep the blockhash cache warm so sends don't wait on an extra RPC round trip."""
+    while True:
+        try:
+            await _fetch_blockhash()
+        except Exception as e:
+            logging.warning(f"Failed to refresh blockhash: {e}")
+        await asyncio.sleep(BLOCKHASH_REFRESH_INTERVAL)
+
+async def prompt_2fa():
+    """Ask the user for a 2FA code and verify it."""
+    code = await ainput("Enter 2FA code: ")
     if not verify_2fa(code):
         logging.error("Invalid 2FA code.")
-        return
+        return False
+    return True
 
-    sender_public_key = sender_keypair.public_key
-    recipient_public_key = PublicKey(recipient_address)
-
-    if token_address:
-        # Transfer SPL tokens
-        token_public_key = PublicKey(token_address)
-        transaction = Transaction().add(
-            transfer_checked(
-                TransferCheckedParams(
-                    program_id=TOKEN_PROGRAM_ID,
-                    source=sender_public_key,
-                    mint=token_public_key,
-                    dest=recipient_public_key,
-                    owner=sender_public_key,
-                    amount=amount,
-                    decimals=decimals  # Use provided decimals
-                )
-            )
-        )
-    else:
-        # Transfer SOL
-        transaction = Transaction().add(transfer(TransferParams(
-            from_pubkey=sender_public_key,
-            to_pubkey=recipient_public_key,
-            lamports=amount  # Amount in lamports (1 SOL = 1,000,000,000 lamports)
-        )))
+async def send_solana_transaction(sender_wallet, recipient_address, amount, token_address=None):
+    """Send SOL or SPL tokens on the Solana blockchain."""
+    if not await prompt_2fa():
+        return
 
+    instructions = await build_transfer_instructions(sender_wallet, recipient_address, amount, token_address)
+    return await send_many(sender_wallet, instructions)
+
+def _transaction_size(instructions, payer):
+    """Serialized size in bytes of a transaction signed only by `payer`."""
+    message = Message.new_with_blockhash(instructions, payer, Hash.default())
+    return 1 + 64 + len(bytes(message))  # signature count + one signature + message
+
+def pack_instruction_groups(payer, instruction_groups):
+    """Pack groups of instructions into as few transactions as fit the size limit.
+
+    Each group (e.g. create-account + transfer) always stays in one transaction.
+    """
+    packed, current = [], []
+    for group in instruction_groups:
+        if current and _transaction_size(current + group, payer) > MAX_TRANSACTION_SIZE:
+            packed.append(current)
+            current = []
+        current = current + group
+    if current:
+        packed.append(current)
+    return packed
+
+def read_transfers_csv(path):
+    """Read transfers from a CSV file with rows of: recipient_address, amount[, token_address]."""
+    transfers = []
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            if not row:
+                continue
+            token_address = row[2].strip() if len(row) > 2 and row[2].strip() else None
+            transfers.append((row[0].strip(), int(row[1]), token_address))
+    return transfers
+
+async def submit_transaction(payload):
+    """Submit a signed, serialized transaction and wait for confirmation."""
     try:
-        transaction.sign(sender_keypair)
-        result = solana_client.send_transaction(transaction, sender_keypair, opts=TxOpts(skip_confirmation=False))
+        result = await solana_client.send_raw_transaction(payload, opts=TxOpts(skip_confirmation=False))
         logging.info(f"Transaction sent: {result}")
         return result
     except RPCException as e:
         logging.error(f"Transaction failed: {e}")
         raise
 
-def receive_solana_transactions(wallet_address, limit=10):
-    """Fetch transaction history for a wallet address."""
-    public_key = PublicKey(wallet_address)
+async def send_many(sender_wallet, instructions):
+    """Send several transfer instructions as a single transaction: one signature, one round trip."""
+    # Compile and sign once in Rust, then submit the serialized bytes as-is
+    transaction = await sign_with_recent_blockhash(instructions, sender_wallet.public_key, [sender_wallet.keypair])
+    return await submit_transaction(bytes(transaction))
+
+async def receive_solana_transactions(wallet_address, limit=10, before=None):
+    """Fetch transaction history for a wallet address, optionally starting before a given signature."""
+    cache_key = (str(wallet_address), limit, before)
+    if cache_key in signature_cache:
+        return signature_cache[cache_key]
     try:
-        transactions = solana_client.get_signatures_for_address(public_key, limit=limit)
+        transactions = await solana_client.get_signatures_for_address(str(wallet_address), before=before, limit=limit)
+        if "result" in transactions:
+            signature_cache[cache_key] = transactions
         return transactions
     except RPCException as e:
         logging.error(f"Failed to fetch transactions: {e}")
         raise
 
+async def _rpc_post(payload):
+    """POST a JSON-RPC request object (or batch array) to the Solana RPC and return the decoded reply."""
+    body = orjson.dumps(payload)
+    response = await _with_retry(lambda: _post(SOLANA_NETWORK_URL, content=body, headers=RPC_HEADERS))
+    return orjson.loads(response.content)
+
+async def _rpc_single(request):
+    """Send one JSON-RPC request object on its own and return its reply."""
+    reply = await _rpc_post(request)
+    if not isinstance(reply, dict):
+        raise RPCException(reply)
+    return reply
+
+async def _batch_rpc(calls):
+    """Send a JSON-RPC batch and return the replies keyed by id (the index of each call in `calls`).
+
+    Replies the server left out are absent; a reply with a null id (e.g. an invalid request) is kept under None.
+    A single call is sent as a plain request object rather than a one-element batch.
+    """
+    requests = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    if len(requests) == 1:
+        return {0: await _rpc_single(requests[0])}
+    replies = await _rpc_post(requests)
+    if not isinstance(replies, list):
+        # Endpoints that disable batching (or rate-limit it) answer with a single error object; send the calls one by one
+        logging.warning(f"Batch request rejected ({replies}), sending {len(requests)} calls individually")
+        return dict(enumerate(await asyncio.gather(*(_rpc_single(request) for request in requests))))
+    # The JSON-RPC spec does not guarantee batch responses come back in request order
+    return {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+
+async def batch_rpc(calls):
+    """Send several JSON-RPC calls to the Solana RPC in a single HTTP request.
+
+    `calls` is a list of (method, params) tuples; one response is returned per call, in the same order.
+    A call the server did not answer gets an error response in its place.
+    """
+    replies = await _batch_rpc(calls)
+    missing = replies.get(None, {}).get("error") or {"code": -32603, "message": "No response in batch reply"}
+    return [replies.get(i) or {"jsonrpc": "2.0", "id": i, "error": missing} for i in range(len(calls))]
+
+async def receive_many(wallet_addresses, limit=10):
+    """Fetch transaction history for several wallet addresses in one RPC round trip."""
+    keys = [(str(address), limit, None) for address in wallet_addresses]
+    results = {key: signature_cache[key] for key in keys if key in signature_cache}
+    missing = [key for key in dict.fromkeys(keys) if key not in results]
+    if missing:
+        responses = await batch_rpc([
+            ("getSignaturesForAddress", [address, {"limit": limit}])
+            for address, limit, _ in missing
+        ])
+        for key, response in zip(missing, responses):
+            results[key] = response
+            if "result" in response:
+                signature_cache[key] = response
+    return [results[key] for key in keys]
+
+def advance_history(pages, wallet_address, transactions, limit, before=None):
+    """Record the page just shown and start fetching the next one in the background.
+
+    The next 'receive_more' then awaits the prefetched page instead of paying for a fresh round trip.
+    `before` is the cursor the shown page was fetched from; paging stays on it if the page was an error.
+    """
+    previous = pages.pop(wallet_address, None)
+    if previous and previous["next"]:
+        previous["next"].cancel()
+    if "result" not in transactions:
+        # The page failed to load: stay on the same cursor so 'receive_more' retries it
+        if before is not None:
+            pages[wallet_address] = {"before": before, "limit": limit, "next": None}
+        return
+    page = transactions["result"] or []
+    if len(page) < limit:
+        pages[wallet_address] = {"before": None, "limit": limit, "next": None}  # Reached the oldest page
+        return
+    before = page[-1]["signature"]
+    task = asyncio.create_task(receive_solana_transactions(wallet_address, limit, before=before))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())  # Errors surface when the page is awaited
+    pages[wallet_address] = {"before": before, "limit": limit, "next": task}
+
+async def balances_many(wallet_addresses):
+    """Fetch SOL balances (in lamports) for several wallet addresses in one RPC round trip."""
+    responses = await batch_rpc([("getBalance", [str(address)]) for address in wallet_addresses])
+    return [response.get("result", {}).get("value") for response in responses]
+
+async def send_multiple(sender_wallet, instruction_sets):
+    """Sign one transaction per instruction list and submit them all in one RPC round trip.
+
+    Transactions are not confirmed; check the returned signatures if you need to.
+    """
+    signers = [sender_wallet.keypair]
+    transactions = [
+        await sign_with_recent_blockhash(instructions, sender_wallet.public_key, signers)
+        for instructions in instruction_sets
+    ]
+    responses = await batch_rpc([
+        ("sendTransaction", [
+            base64.b64encode(bytes(transaction)).decode(),
+            {"encoding": "base64", "preflightCommitment": Confirmed}
+        ])
+        for transaction in transactions
+    ])
+    for response in responses:
+        if "error" in response:
+            logging.error(f"Transaction failed: {response['error']}")
+    return responses
+
 # Chatbot Interface
-def chatbot():
-    """Command-line chatbot interface."""
-    print("Welcome to the Advanced DeepSeek + Solana Chatbot!")
+@dataclass
+class ChatContext:
+    """State shared by the chatbot command handlers."""
+    session: aiohttp.ClientSession
+    wallets: dict
+    executor: concurrent.futures.Executor  # For blocking work: terminal prompts, file reads
+    content_disk_cache: diskcache.Cache  # Generated content persisted across runs
+    # Transaction history paging: {wallet_address: {"before": last signature shown, "limit": n, "next": Task}}
+    history_pages: dict = field(default_factory=dict)
+    running: bool = True
+
+def _lookup_wallets(ctx, wallet_names):
+    """Return the Wallet records for the given names, or None (after telling the user) if any is unknown."""
+    missing = [name for name in wallet_names if name not in ctx.wallets]
+    if missing:
+        print(f"Wallet '{missing[0]}' not found. Connect it first.")
+        return None
+    return [ctx.wallets[name] for name in wallet_names]
+
+async def handle_help(ctx, args):
+    """Print the list of commands."""
     print("Commands:")
     print("1. connect_wallet <wallet_name> - Connect a Solana wallet")
     print("2. switch_wallet <wallet_name> - Switch to another connected wallet")
     print("3. send <wallet_name> <recipient_address> <amount> [token_address] - Send SOL or SPL tokens")
-    print("4. receive <wallet_name> [limit] - View transaction history")
-    print("5. nfts <wallet_name> - View NFTs in the wallet")
+    print("4. receive <wallet_name> [wallet_name ...] [limit] - View transaction history")
+    print("5. nfts <wallet_name> [wallet_name ...] - View NFTs in one or more wallets")
     print("6. price - Get the current SOL price")
     print("7. generate <prompt> [model] [max_tokens] - Generate content using DeepSeek")
-    print("8. export_history <wallet_name> <filename> - Export transaction history to CSV")
-    print("9. exit - Exit the chatbot")
+    print("8. export_history <wallet_name> <filename> [limit] - Export transaction history to CSV")
+    print("9. balance <wallet_name> [wallet_name ...] - View SOL balances")
+    print("10. send_batch <wallet_name> <path.csv> - Send to many recipients (CSV rows: recipient, amount[, token])")
+    print("11. receive_more <wallet_name> - View the next page of transaction history")
+    print("12. help - Show this list of commands")
+    print("13. exit - Exit the chatbot")
+
+async def handle_connect_wallet(ctx, args):
+    """connect_wallet <wallet_name>"""
+    if len(args) != 1:
+        print("Usage: connect_wallet <wallet_name>")
+        return
+    # getpass blocks, so read the key on the shared pool to keep background tasks running
+    loop = asyncio.get_running_loop()
+    private_key = await loop.run_in_executor(ctx.executor, getpass, "Enter your private key (base58 encoded): ")
+    connect_wallet(args[0], private_key)
+
+async def handle_switch_wallet(ctx, args):
+    """switch_wallet <wallet_name>"""
+    if len(args) != 1:
+        print("Usage: switch_wallet <wallet_name>")
+        return
+    switch_wallet(args[0])
 
-    while True:
-        command = input("\nEnter command: ").strip().split()
+async def handle_send(ctx, args):
+    """send <wallet_name> <recipient_address> <amount> [token_address]"""
+    if len(args) < 3:
+        print("Usage: send <wallet_name> <recipient_address> <amount> [token_address]")
+        return
+    wallet_name, recipient_address, amount = args[0], args[1], int(args[2])
+    token_address = args[3] if len(args) > 3 else None
+    found = _lookup_wallets(ctx, [wallet_name])
+    if not found:
+        return
+    result = await send_solana_transaction(found[0], recipient_address, amount, token_address)
+    print("Transaction Result:", result)
+
+async def handle_send_batch(ctx, args):
+    """send_batch <wallet_name> <path.csv>"""
+    if len(args) != 2:
+        print("Usage: send_batch <wallet_name> <path.csv>")
+        return
+    wallet_name, path = args
+    found = _lookup_wallets(ctx, [wallet_name])
+    if not found:
+        return
+    sender_wallet = found[0]
+    loop = asyncio.get_running_loop()
+    transfers = await loop.run_in_executor(ctx.executor, read_transfers_csv, path)
+    if not transfers:
+        print(f"No transfers found in {path}.")
+        return
+    if not await prompt_2fa():
+        return
+    # Set up each token's builder once before building the transfers concurrently
+    first_recipients = {token_address: recipient for recipient, _, token_address in reversed(transfers)}
+    await asyncio.gather(*(
+        get_transfer_builder(sender_wallet, token_address, recipient_address)
+        for token_address, recipient_address in first_recipients.items()
+    ))
+    instruction_groups = await asyncio.gather(*(
+        build_transfer_instructions(sender_wallet, recipient_address, amount, token_address)
+        for recipient_address, amount, token_address in transfers
+    ))
+    # Many transfers per transaction, and all the resulting transactions go out in one RPC round trip
+    packed = pack_instruction_groups(sender_wallet.public_key, instruction_groups)
+    results = await send_multiple(sender_wallet, packed)
+    print(f"Sent {len(transfers)} transfers in {len(packed)} transactions (unconfirmed):")
+    for result in results:
+        print("Transaction Result:", result)
+
+async def handle_receive(ctx, args):
+    """receive <wallet_name> [wallet_name ...] [limit]"""
+    wallet_names = args[:-1] if len(args) > 1 and args[-1].isdigit() else args
+    limit = int(args[-1]) if len(wallet_names) < len(args) else 10
+    if len(wallet_names) < 1:
+        print("Usage: receive <wallet_name> [wallet_name ...] [limit]")
+        return
+    found = _lookup_wallets(ctx, wallet_names)
+    if not found:
+        return
+    # One batched RPC request for all wallets instead of one round trip each
+    histories = await receive_many([wallet.address for wallet in found], limit)
+    for wallet_name, wallet, transactions in zip(wallet_names, found, histories):
+        print(f"Transaction History ({wallet_name}):", orjson.dumps(transactions, option=orjson.OPT_INDENT_2).decode())
+        advance_history(ctx.history_pages, wallet.address, transactions, limit)
+
+async def handle_receive_more(ctx, args):
+    """receive_more <wallet_name>"""
+    if len(args) != 1:
+        print("Usage: receive_more <wallet_name>")
+        return
+    found = _lookup_wallets(ctx, args)
+    if not found:
+        return
+    address = found[0].address
+    state = ctx.history_pages.get(address)
+    if state is None:
+        print(f"Run 'receive {args[0]}' first.")
+        return
+    if state["before"] is None:
+        print(f"No older transactions for '{args[0]}'.")
+        return
+    # Normally already fetched (or in flight) while the previous page was being read
+    transactions = None
+    prefetch, state["next"] = state["next"], None
+    if prefetch is not None:
+        try:
+            transactions = await prefetch
+        except Exception as e:
+            logging.warning(f"Prefetching transactions failed ({e}), fetching again")
+    if transactions is None or "result" not in transactions:
+        transactions = await receive_solana_transactions(address, state["limit"], before=state["before"])
+    print(f"Transaction History ({args[0]}):", orjson.dumps(transactions, option=orjson.OPT_INDENT_2).decode())
+    advance_history(ctx.history_pages, address, transactions, state["limit"], before=state["before"])
+
+async def handle_nfts(ctx, args):
+    """nfts <wallet_name> [wallet_name ...]"""
+    if len(args) < 1:
+        print("Usage: nfts <wallet_name> [wallet_name ...]")
+        return
+    found = _lookup_wallets(ctx, args)
+    if not found:
+        return
+
+    async def show(wallet_name, wallet):
+        count = 0
+        async for nft in stream_nfts(ctx.session, wallet.address):
+            count += 1
+            print(f"[{wallet_name}] {nft.get('name') or 'Unnamed'} ({nft.get('nft_id')})")
+        print(f"[{wallet_name}] {count} NFTs")
+
+    # Stream all requested wallets concurrently, printing each NFT as soon as it is parsed
+    await asyncio.gather(*(show(wallet_name, wallet) for wallet_name, wallet in zip(args, found)))
+
+async def handle_price(ctx, args):
+    """price"""
+    price = await get_sol_price(ctx.session)
+    print(f"Current SOL Price: ${price}")
+
+async def handle_generate(ctx, args):
+    """generate <prompt> [model] [max_tokens]"""
+    if len(args) < 1:
+        print("Usage: generate <prompt> [model] [max_tokens]")
+        return
+    prompt = args[0]
+    model = args[1] if len(args) > 1 else "default"
+    max_tokens = int(args[2]) if len(args) > 2 else 100
+    generated_content = await generate_with_deepseek(prompt, model, max_tokens, ctx.content_disk_cache)
+    print("Generated Content:", generated_content)
+
+async def handle_export_history(ctx, args):
+    """export_history <wallet_name> <filename> [limit]"""
+    if len(args) < 2:
+        print("Usage: export_history <wallet_name> <filename> [limit]")
+        return
+    wallet_name, filename = args[0], args[1]
+    limit = int(args[2]) if len(args) > 2 else 10
+    found = _lookup_wallets(ctx, [wallet_name])
+    if not found:
+        return
+    await export_transaction_history(found[0].address, filename, limit)
+
+async def handle_balance(ctx, args):
+    """balance <wallet_name> [wallet_name ...]"""
+    if len(args) < 1:
+        print("Usage: balance <wallet_name> [wallet_name ...]")
+        return
+    found = _lookup_wallets(ctx, args)
+    if not found:
+        return
+    balances = await balances_many([wallet.address for wallet in found])
+    for wallet_name, lamports in zip(args, balances):
+        if lamports is None:
+            print(f"Balance ({wallet_name}): unavailable")
+        else:
+            print(f"Balance ({wallet_name}): {lamports / 1_000_000_000} SOL")
+
+async def handle_exit(ctx, args):
+    """Stop the chatbot loop."""
+    print("Goodbye!")
+    ctx.running = False
+
+# Command name -> handler(ctx, args)
+HANDLERS = {
+    "help": handle_help,
+    "connect_wallet": handle_connect_wallet,
+    "switch_wallet": handle_switch_wallet,
+    "send": handle_send,
+    "send_batch": handle_send_batch,
+    "receive": handle_receive,
+    "receive_more": handle_receive_more,
+    "nfts": handle_nfts,
+    "price": handle_price,
+    "generate": handle_generate,
+    "export_history": handle_export_history,
+    "balance": handle_balance,
+    "exit": handle_exit,
+}
+
+async def chatbot():
+    """Command-line chatbot interface, driven by a single event loop."""
+    print("Welcome to the Advanced DeepSeek + Solana Chatbot!")
+
+    # One connection pool for the whole session instead of one per command
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300),
+        json_serialize=lambda obj: orjson.dumps(obj).decode()
+    )
+    ctx = ChatContext(
+        session=session,
+        wallets=wallets,
+        executor=io_executor,
+        content_disk_cache=diskcache.Cache(CONTENT_CACHE_DIR, size_limit=CONTENT_CACHE_SIZE_LIMIT)
+    )
+    # Route default-executor work (e.g. from libraries) to the shared pool too
+    asyncio.get_running_loop().set_default_executor(ctx.executor)
+    blockhash_refresher = asyncio.create_task(refresh_blockhash_periodically())
+    try:
+        await handle_help(ctx, [])
+        await _chatbot_loop(ctx)
+    finally:
+        blockhash_refresher.cancel()
+        await session.close()
+        await solana_client.close()
+        ctx.executor.shutdown(wait=False)
+        ctx.content_disk_cache.close()
+
+async def _chatbot_loop(ctx):
+    """Read and dispatch chatbot commands until the user exits."""
+    while ctx.running:
+        command = (await ainput("\nEnter command: ")).strip().split()
         if not command:
             continue
 
-        cmd = command[0].lower()
-        args = command[1:]
+        # Interned so the dispatch lookup compares command names by identity
+        handler = HANDLERS.get(sys.intern(command[0].lower()))
+        if handler is None:
+            print("Invalid command. Type 'help' for a list of commands.")
+            continue
 
         try:
-            if cmd == "connect_wallet":
-                if len(args) != 1:
-                    print("Usage: connect_wallet <wallet_name>")
-                    continue
-                wallet_name = args[0]
-                connect_wallet(wallet_name)
-
-            elif cmd == "switch_wallet":
-                if len(args) != 1:
-                    print("Usage: switch_wallet <wallet_name>")
-                    continue
-                wallet_name = args[0]
-                switch_wallet(wallet_name)
-
-            elif cmd == "send":
-                if len(args) < 3:
-                    print("Usage: send <wallet_name> <recipient_address> <amount> [token_address]")
-                    continue
-                wallet_name, recipient_address, amount = args[0], args[1], int(args[2])
-                token_address = args[3] if len(args) > 3 else None
-                if wallet_name not in wallets:
-                    print(f"Wallet '{wallet_name}' not found. Connect it first.")
-                    continue
-                result = send_solana_transaction(wallets[wallet_name], recipient_address, amount, token_address)
-                print("Transaction Result:", result)
-
-            elif cmd == "receive":
-                if len(args) < 1:
-                    print("Usage: receive <wallet_name> [limit]")
-                    continue
-                wallet_name = args[0]
-                limit = int(args[1]) if len(args) > 1 else 10
-                if wallet_name not in wallets:
-                    print(f"Wallet '{wallet_name}' not found. Connect it first.")
-                    continue
-                transactions = receive_solana_transactions(wallets[wallet_name].public_key, limit)
-                print("Transaction History:", json.dumps(transactions, indent=2))
-
-            elif cmd == "nfts":
-                if len(args) != 1:
-                    print("Usage: nfts <wallet_name>")
-                    continue
-                wallet_name = args[0]
-                if wallet_name not in wallets:
-                    print(f"Wallet '{wallet_name}' not found. Connect it first.")
-                    continue
-                nfts = asyncio.run(get_nfts(wallets[wallet_name].public_key))
-                print("NFTs:", json.dumps(nfts, indent=2))
-
-            elif cmd == "price":
-                price = asyncio.run(get_sol_price())
-                print(f"Current SOL Price: ${price}")
-
-            elif cmd == "generate":
-                if len(args) < 1:
-                    print("Usage: generate <prompt> [model] [max_tokens]")
-                    continue
-                prompt = args[0]
-                model = args[1] if len(args) > 1 else "default"
-                max_tokens = int(args[2]) if len(args) > 2 else 100
-                generated_content = generate_with_deepseek(prompt, model, max_tokens)
-                print("Generated Content:", generated_content)
-
-            elif cmd == "export_history":
-                if len(args) < 2:
-                    print("Usage: export_history <wallet_name> <filename>")
-                    continue
-                wallet_name, filename = args[0], args[1]
-                if wallet_name not in wallets:
-                    print(f"Wallet '{wallet_name}' not found. Connect it first.")
-                    continue
-                export_transaction_history(wallets[wallet_name].public_key, filename)
-
-            elif cmd == "exit":
-                print("Goodbye!")
-                break
-
-            else:
-                print("Invalid command. Type 'help' for a list of commands.")
-
+            await handler(ctx, command[1:])
         except Exception as e:
             print("Error:", str(e))
 
 if __name__ == "__main__":
-    chatbot()
+    asyncio.run(chatbot())